@@ -7,12 +7,17 @@ This package contains reusable code for all notebooks.
 __version__ = "1.0.0"
 
 from .llm_client import LLMClient
+from .response import LLMResponse
 from .cost_tracker import CostTracker
+from .evaluation import ModelEvaluator, summarize_results
 from .utils import estimate_tokens, estimate_cost, format_response, save_task_output, append_to_reflection
 
 __all__ = [
     'LLMClient',
+    'LLMResponse',
     'CostTracker',
+    'ModelEvaluator',
+    'summarize_results',
     'estimate_tokens',
     'estimate_cost',
     'format_response',
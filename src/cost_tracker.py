@@ -4,7 +4,7 @@ Cost Tracker for API Usage
 Tracks token usage and costs across different LLM models.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from datetime import datetime
 
 
@@ -27,8 +27,57 @@ class CostTracker:
         self.total_input_tokens = 0
         self.total_output_tokens = 0
         self.total_cost = 0.0
+        self.total_tokens_saved = 0
+        self.total_cost_saved = 0.0
         self.calls = []
     
+    @classmethod
+    def calculate_cost(cls, model: str, input_tokens: int, output_tokens: int) -> float:
+        """
+        Calculate the cost of a single call without recording it.
+        
+        Args:
+            model: Model name
+            input_tokens: Prompt tokens
+            output_tokens: Completion tokens
+        
+        Returns:
+            Cost in dollars
+        """
+        # Get pricing (default to Sonnet if unknown)
+        if model in cls.PRICING:
+            pricing = cls.PRICING[model]
+        elif any(x in model.lower() for x in ["ollama", "llama", "mistral", "qwen"]):
+            pricing = cls.PRICING["ollama"]
+        else:
+            pricing = cls.PRICING["claude-sonnet-4-5-20250929"]
+        
+        input_cost = (input_tokens / 1_000_000) * pricing['input']
+        output_cost = (output_tokens / 1_000_000) * pricing['output']
+        return input_cost + output_cost
+    
+    @staticmethod
+    def billed_tokens(response: Dict[str, Any]) -> Tuple[int, int]:
+        """
+        Get the tokens paid for by a response, including discarded attempts.
+        
+        Args:
+            response: Successful response dictionary from LLMClient.generate()
+        
+        Returns:
+            Tuple of (input_tokens, output_tokens)
+        """
+        usage = response['usage']
+        input_tokens = usage['input_tokens']
+        output_tokens = usage['output_tokens']
+        
+        # A retry after adaptive max_tokens truncation also paid for the first attempt
+        wasted = response.get('truncated_usage')
+        if wasted:
+            input_tokens += wasted['input_tokens']
+            output_tokens += wasted['output_tokens']
+        return input_tokens, output_tokens
+    
     def add_call(self, response: Dict[str, Any]):
         """
         Add an API call to the tracker.
@@ -36,37 +85,37 @@ class CostTracker:
         Args:
             response: Response dictionary from LLMClient.generate()
         """
-        if "error" in response:
+        # Errors and cache hits didn't spend any tokens
+        if "error" in response or response.get("cache_hit"):
             return
         
         model = response['model']
-        input_tokens = response['usage']['input_tokens']
-        output_tokens = response['usage']['output_tokens']
+        usage = response['usage']
+        input_tokens, output_tokens = self.billed_tokens(response)
         
-        # Get pricing (default to Sonnet if unknown)
-        if model in self.PRICING:
-            pricing = self.PRICING[model]
-        elif any(x in model.lower() for x in ["ollama", "llama", "mistral", "qwen"]):
-            pricing = self.PRICING["ollama"]
-        else:
-            pricing = self.PRICING["claude-sonnet-4-5-20250929"]
+        total_call_cost = self.calculate_cost(model, input_tokens, output_tokens)
         
-        # Calculate cost
-        input_cost = (input_tokens / 1_000_000) * pricing['input']
-        output_cost = (output_tokens / 1_000_000) * pricing['output']
-        total_call_cost = input_cost + output_cost
+        # Input tokens removed by prompt compaction (see LLMClient.enable_prompt_compaction)
+        tokens_saved = response.get('compaction', {}).get('token_savings', 0)
+        cost_saved = self.calculate_cost(model, tokens_saved, 0)
         
         # Update totals
         self.total_input_tokens += input_tokens
         self.total_output_tokens += output_tokens
         self.total_cost += total_call_cost
+        self.total_tokens_saved += tokens_saved
+        self.total_cost_saved += cost_saved
         
         # Record call
         self.calls.append({
             'model': model,
             'input_tokens': input_tokens,
             'output_tokens': output_tokens,
+            'response_tokens': usage['output_tokens'],
             'cost': total_call_cost,
+            'tokens_saved': tokens_saved,
+            'stop_reason': response.get('stop_reason'),
+            'template': response.get('template'),
             'timestamp': datetime.now()
         })
     
@@ -84,6 +133,9 @@ class CostTracker:
         print(f"Total input tokens: {self.total_input_tokens:,}")
         print(f"Total output tokens: {self.total_output_tokens:,}")
         print(f"Total cost: ${self.total_cost:.4f}")
+        if self.total_tokens_saved:
+            print(f"Saved by prompt compaction: {self.total_tokens_saved:,} input tokens "
+                  f"(${self.total_cost_saved:.4f})")
         print()
         
         if len(self.calls) > 0:
@@ -106,6 +158,8 @@ class CostTracker:
         self.total_input_tokens = 0
         self.total_output_tokens = 0
         self.total_cost = 0.0
+        self.total_tokens_saved = 0
+        self.total_cost_saved = 0.0
         self.calls = []
         print("✓ Cost tracker reset")
     
@@ -116,5 +170,7 @@ class CostTracker:
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
             "total_cost": self.total_cost,
+            "total_tokens_saved": self.total_tokens_saved,
+            "total_cost_saved": self.total_cost_saved,
             "average_cost_per_call": self.total_cost / len(self.calls) if self.calls else 0
         }
\ No newline at end of file
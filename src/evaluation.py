@@ -0,0 +1,389 @@
+"""
+Model Comparison Evaluation Harness
+
+Runs a prompt x model x temperature matrix through LLMClient concurrently,
+checkpoints every finished cell to a CSV results table and summarizes the
+table per model without holding all outputs in memory.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from .cost_tracker import CostTracker
+
+
+RESULT_COLUMNS = [
+    "cell_id",
+    "prompt_name",
+    "model",
+    "temperature",
+    "repeat",
+    "latency_s",
+    "input_tokens",
+    "output_tokens",
+    "cost",
+    "stop_reason",
+    "output",
+]
+
+
+def backend_for_model(model: str) -> str:
+    """Return "claude" for Claude models and "ollama" for everything else"""
+    return "claude" if model.startswith("claude") else "ollama"
+
+
+def build_cells(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand a matrix spec into individual evaluation cells.
+
+    Args:
+        spec: Dictionary with keys:
+            prompts: {name: prompt} mapping
+            models: List of model names
+            temperatures: List of temperatures (default: [1.0])
+            repeats: Samples per combination (default: 1)
+            system, max_tokens: Optional generation settings
+
+    Returns:
+        List of cell dictionaries, each with a 'cell_id' that changes whenever
+        anything sent to the model for that cell changes
+    """
+    cells = []
+    for prompt_name, prompt in spec["prompts"].items():
+        for model in spec["models"]:
+            for temperature in spec.get("temperatures", [1.0]):
+                for repeat in range(spec.get("repeats", 1)):
+                    key = json.dumps([
+                        prompt_name, prompt, spec.get("system"), spec.get("max_tokens", 1024),
+                        model, float(temperature), repeat
+                    ])
+                    cells.append({
+                        "cell_id": hashlib.sha1(key.encode("utf-8")).hexdigest()[:16],
+                        "prompt_name": prompt_name,
+                        "model": model,
+                        "temperature": float(temperature),
+                        "repeat": repeat,
+                    })
+    return cells
+
+
+def _parse_row(row: List[str]) -> Optional[Dict[str, Any]]:
+    """Convert a raw CSV row into a typed result, or None if it is malformed"""
+    if len(row) != len(RESULT_COLUMNS):
+        return None
+    record = dict(zip(RESULT_COLUMNS, row))
+    try:
+        record["temperature"] = float(record["temperature"])
+        record["repeat"] = int(record["repeat"])
+        record["latency_s"] = float(record["latency_s"])
+        record["input_tokens"] = int(record["input_tokens"])
+        record["output_tokens"] = int(record["output_tokens"])
+        record["cost"] = float(record["cost"])
+    except ValueError:
+        return None
+    return record
+
+
+def iter_results(results_path: str) -> Iterator[Tuple[Optional[Dict[str, Any]], int]]:
+    """
+    Stream a results table one record at a time.
+
+    A record only counts as complete if it ends with a newline, has no
+    unterminated quoted field and every column parses; rows torn by an
+    interrupted run yield None.
+
+    Args:
+        results_path: CSV written by ModelEvaluator.run()
+
+    Yields:
+        Tuples of (parsed row or None, byte offset where the record ends).
+        The header is skipped.
+    """
+    raw = []
+    consumed = [0]
+
+    with open(results_path, newline="", encoding="utf-8") as f:
+        def lines():
+            for line in f:
+                consumed[0] += len(line.encode("utf-8"))
+                raw.append(line)
+                yield line
+
+        for index, row in enumerate(csv.reader(lines())):
+            text = "".join(raw)
+            raw.clear()
+            if index == 0:
+                continue
+            complete = text.endswith("\n") and text.count('"') % 2 == 0
+            yield (_parse_row(row) if complete else None), consumed[0]
+
+
+def repair_results(results_path: str) -> int:
+    """
+    Truncate a results table after its last complete record.
+
+    Args:
+        results_path: CSV written by ModelEvaluator.run()
+
+    Returns:
+        Number of bytes removed
+    """
+    if not os.path.exists(results_path):
+        return 0
+
+    size = os.path.getsize(results_path)
+    valid_end = 0
+    with open(results_path, newline="", encoding="utf-8") as f:
+        header = f.readline()
+    if header.endswith("\n") and header.rstrip("\r\n") == ",".join(RESULT_COLUMNS):
+        valid_end = len(header.encode("utf-8"))
+
+    if valid_end:
+        for row, end in iter_results(results_path):
+            if row is not None:
+                valid_end = end
+
+    if valid_end < size:
+        with open(results_path, "r+b") as f:
+            f.truncate(valid_end)
+    return size - valid_end
+
+
+def load_completed_cells(results_path: str) -> set:
+    """
+    Read the cell ids already present in a results table.
+
+    Args:
+        results_path: Path to the CSV written by ModelEvaluator.run()
+
+    Returns:
+        Set of completed cell ids (empty if the file does not exist)
+    """
+    if not os.path.exists(results_path):
+        return set()
+    return {row["cell_id"] for row, _ in iter_results(results_path) if row is not None}
+
+
+class ModelEvaluator:
+    """Run model comparison matrices concurrently with resumable checkpoints"""
+
+    # Concurrent requests allowed per backend
+    DEFAULT_CONCURRENCY = {
+        "claude": 4,
+        "ollama": 1
+    }
+
+    def __init__(
+        self,
+        client,
+        tracker: Optional[CostTracker] = None,
+        concurrency: Optional[Dict[str, int]] = None
+    ):
+        """
+        Initialize the evaluator.
+
+        Args:
+            client: An initialized LLMClient
+            tracker: CostTracker to record calls in (optional)
+            concurrency: Per-backend worker limits, e.g. {"claude": 8, "ollama": 2}
+        """
+        self.client = client
+        self.tracker = tracker
+        self.concurrency = dict(self.DEFAULT_CONCURRENCY)
+        if concurrency:
+            self.concurrency.update(concurrency)
+
+        self._pricing = tracker if tracker is not None else CostTracker()
+        self._lock = threading.Lock()
+
+    def run(self, spec: Dict[str, Any], results_path: str) -> Dict[str, Any]:
+        """
+        Run every cell of the matrix that is not already in the results table.
+
+        Args:
+            spec: Matrix spec (see build_cells). May also contain 'system'
+                and 'max_tokens', passed through to LLMClient.generate()
+            results_path: CSV file used both as checkpoint and results table
+
+        Returns:
+            Dictionary with 'completed', 'skipped', 'failed' and 'results_path'
+        """
+        cells = build_cells(spec)
+        removed = repair_results(results_path)
+        if removed:
+            print(f"⚠ Dropped {removed} bytes of incomplete rows from {results_path}")
+        done = load_completed_cells(results_path)
+        pending = [c for c in cells if c["cell_id"] not in done]
+
+        print(f"Evaluation: {len(cells)} cells, {len(cells) - len(pending)} already done, "
+              f"{len(pending)} to run")
+
+        directory = os.path.dirname(results_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        failed = []
+        completed = 0
+
+        with open(results_path, "a", newline="", encoding="utf-8") as f:
+            if f.tell() == 0:
+                self._write_row(f, dict(zip(RESULT_COLUMNS, RESULT_COLUMNS)))
+
+            # One pool per backend so a slow local model never starves Claude
+            pools = {
+                backend: ThreadPoolExecutor(max_workers=max(1, limit))
+                for backend, limit in self.concurrency.items()
+            }
+            futures = {}
+            handled = set()
+
+            def handle(future):
+                nonlocal completed
+                handled.add(future)
+                row = future.result()
+                if "error" in row:
+                    failed.append(row)
+                    print(f"  ❌ {row['prompt_name']} / {row['model']}: {row['error']}")
+                    return
+                with self._lock:
+                    self._write_row(f, row)
+                completed += 1
+
+            try:
+                for cell in pending:
+                    pool = pools[backend_for_model(cell["model"])]
+                    futures[pool.submit(self._run_cell, spec, cell)] = cell
+
+                for future in as_completed(futures):
+                    handle(future)
+            finally:
+                # On interrupt: drop queued cells, let running ones finish and
+                # checkpoint them so calls already paid for are not lost
+                for future in futures:
+                    future.cancel()
+                for pool in pools.values():
+                    pool.shutdown(wait=True)
+                for future in futures:
+                    if future not in handled and not future.cancelled() and future.exception() is None:
+                        handle(future)
+
+        print(f"✓ Evaluation finished: {completed} completed, {len(failed)} failed")
+        return {
+            "completed": completed,
+            "skipped": len(cells) - len(pending),
+            "failed": failed,
+            "results_path": results_path
+        }
+
+    def _run_cell(self, spec: Dict[str, Any], cell: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a single cell and turn the response into a result row"""
+        model = cell["model"]
+
+        start = time.perf_counter()
+        response = self.client.generate(
+            spec["prompts"][cell["prompt_name"]],
+            system=spec.get("system"),
+            model=model,
+            temperature=cell["temperature"],
+            max_tokens=spec.get("max_tokens", 1024),
+            use_claude=backend_for_model(model) == "claude"
+        )
+        latency = time.perf_counter() - start
+
+        if "error" in response:
+            return dict(cell, error=response["error"])
+
+        # Bill the same tokens CostTracker.add_call() would (incl. truncated retries)
+        input_tokens, output_tokens = CostTracker.billed_tokens(response)
+
+        if self.tracker is not None:
+            with self._lock:
+                self.tracker.add_call(response)
+
+        return dict(
+            cell,
+            latency_s=round(latency, 4),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost=self._pricing.calculate_cost(model, input_tokens, output_tokens),
+            stop_reason=response.get("stop_reason", ""),
+            output=response["content"]
+        )
+
+    @staticmethod
+    def _write_row(f, row: Dict[str, Any]):
+        """Write one CSV row in a single call and flush it to disk"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow([row.get(col, "") for col in RESULT_COLUMNS])
+        f.write(buffer.getvalue())
+        f.flush()
+
+
+def summarize_results(results_path: str, group_by: str = "model") -> Dict[str, Dict[str, Any]]:
+    """
+    Aggregate a results table by streaming it row by row.
+
+    Args:
+        results_path: CSV written by ModelEvaluator.run()
+        group_by: Column to group on ("model", "prompt_name", "temperature")
+
+    Returns:
+        Dictionary mapping each group to its aggregate metrics
+    """
+    groups: Dict[Any, Dict[str, Any]] = {}
+
+    for row, _ in iter_results(results_path):
+        if row is None:
+            continue
+
+        stats = groups.setdefault(row[group_by], {
+            "calls": 0,
+            "total_input_tokens": 0,
+            "total_output_tokens": 0,
+            "total_cost": 0.0,
+            "total_latency_s": 0.0,
+            "max_latency_s": 0.0,
+            "truncated": 0
+        })
+        latency = row["latency_s"]
+        stats["calls"] += 1
+        stats["total_input_tokens"] += row["input_tokens"]
+        stats["total_output_tokens"] += row["output_tokens"]
+        stats["total_cost"] += row["cost"]
+        stats["total_latency_s"] += latency
+        stats["max_latency_s"] = max(stats["max_latency_s"], latency)
+        if row["stop_reason"] in ("max_tokens", "length"):
+            stats["truncated"] += 1
+
+    for stats in groups.values():
+        calls = stats["calls"]
+        stats["mean_latency_s"] = stats["total_latency_s"] / calls
+        stats["mean_output_tokens"] = stats["total_output_tokens"] / calls
+        stats["cost_per_call"] = stats["total_cost"] / calls
+
+    return groups
+
+
+def print_comparison(summary: Dict[str, Dict[str, Any]]):
+    """
+    Print a comparison table from summarize_results().
+
+    Args:
+        summary: Output of summarize_results()
+    """
+    print("=" * 78)
+    print(f"{'Group':<30} {'Calls':>6} {'Mean lat':>9} {'Max lat':>9} "
+          f"{'Out tok':>8} {'Cost':>10}")
+    print("=" * 78)
+    for name, stats in sorted(summary.items()):
+        print(f"{str(name)[:30]:<30} {stats['calls']:>6} "
+              f"{stats['mean_latency_s']:>8.2f}s {stats['max_latency_s']:>8.2f}s "
+              f"{stats['mean_output_tokens']:>8.0f} ${stats['total_cost']:>9.4f}")
+    print("=" * 78)
@@ -5,9 +5,16 @@ This module provides a single interface for interacting with both
 cloud-based (Claude) and local (Ollama) language models.
 """
 
+import math
 import os
 import requests
-from typing import Dict, List, Optional, Any
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Any
+
+from .cost_tracker import CostTracker
+from .response import LLMResponse, decode_ollama_body
+from .token_budget import TRUNCATED_STOP_REASONS
 
 
 class LLMClient:
@@ -23,6 +30,9 @@ class LLMClient:
         self.path = path
         self.claude_client = None
         self.default_model = None
+        self.token_budget = None
+        self.semantic_cache = None
+        self.prompt_compactor = None
         
         # Initialize based on path
         if path in ["A", "C"]:
@@ -80,8 +90,9 @@ class LLMClient:
         model: Optional[str] = None,
         temperature: float = 1.0,
         max_tokens: int = 1024,
-        use_claude: bool = None
-    ) -> Dict[str, Any]:
+        use_claude: bool = None,
+        template: Optional[str] = None
+    ) -> LLMResponse:
         """
         Generate a response from the LLM.
         
@@ -92,9 +103,12 @@ class LLMClient:
             temperature: Randomness (0-1 for Claude, 0-2 for Ollama)
             max_tokens: Maximum response length
             use_claude: For hybrid path, explicitly choose Claude
+            template: Name of the prompt template, used to group output-length
+                statistics for adaptive max_tokens and to scope the
+                near-duplicate cache (optional)
         
         Returns:
-            Dictionary with 'content', 'model', 'usage' keys
+            LLMResponse with dict-style 'content', 'model', 'usage' keys
         """
         # Determine which backend to use
         use_claude_backend = False
@@ -109,11 +123,257 @@ class LLMClient:
         if model is None:
             model = self.default_model
         
-        # Generate response
-        if use_claude_backend:
-            return self._generate_claude(prompt, system, model, temperature, max_tokens)
-        else:
-            return self._generate_ollama(prompt, system, model, temperature, max_tokens)
+        backend = self._generate_claude if use_claude_backend else self._generate_ollama
+        
+        # Compact the prompt before sending when enabled
+        compaction = None
+        if self.prompt_compactor is not None:
+            from .utils import calculate_savings, estimate_tokens
+            compacted = self.prompt_compactor.compact(prompt, system)
+            compaction = calculate_savings(estimate_tokens(prompt), estimate_tokens(compacted), model)
+            # calculate_savings only knows Claude prices; use the tracker's per-model table
+            compaction["cost_savings"] = CostTracker.calculate_cost(model, compaction["token_savings"], 0)
+            prompt = compacted
+        
+        # Serve near-duplicate prompts from the cache when enabled
+        cache = self.semantic_cache
+        use_cache = cache is not None and cache.is_eligible(temperature, template)
+        if use_cache:
+            scope = (model, system, template)
+            cached = cache.lookup(prompt, scope)
+            if cached is not None and not cache.should_audit():
+                cached["cache_hit"] = True
+                cached["usage"] = {"input_tokens": 0, "output_tokens": 0}
+                if template is not None:
+                    cached["template"] = template
+                if compaction is not None:
+                    cached["compaction"] = compaction
+                return cached
+        
+        # Tighten max_tokens from history when adaptive mode is enabled
+        cap = max_tokens
+        if self.token_budget is not None:
+            cap = self.token_budget.suggest(model, template, max_tokens)
+        
+        response = backend(prompt, system, model, temperature, cap)
+        
+        # Retry with the caller's cap only if the tighter one truncated the output
+        retried = False
+        reserved = cap
+        if cap < max_tokens and response.get("stop_reason") in TRUNCATED_STOP_REASONS:
+            retried = True
+            truncated = response
+            reserved += max_tokens
+            response = backend(prompt, system, model, temperature, max_tokens)
+            if "error" in response:
+                # Fall back to the truncated answer; it was paid for and still gets billed
+                response = truncated
+            else:
+                # Keep the discarded attempt's tokens so CostTracker still bills them
+                response["truncated_usage"] = truncated["usage"]
+        
+        if self.token_budget is not None:
+            self.token_budget.record(max_tokens, reserved, retried)
+        
+        if use_cache and "error" not in response:
+            if cached is not None:
+                cache.record_audit(cached["content"], response["content"])
+            elif response.get("stop_reason") not in TRUNCATED_STOP_REASONS:
+                cache.store(prompt, scope, response.copy())
+        
+        if template is not None:
+            response["template"] = template
+        if compaction is not None:
+            response["compaction"] = compaction
+        return response
+    
+    def enable_adaptive_max_tokens(self, tracker, **kwargs):
+        """
+        Derive max_tokens from output lengths recorded in a CostTracker.
+        
+        Calls must be recorded with tracker.add_call() for the history to grow.
+        Pass template=... to generate() to keep per-template statistics.
+        
+        Args:
+            tracker: CostTracker holding the call history
+            **kwargs: Passed to AdaptiveTokenBudget (percentile, headroom, ...)
+        
+        Returns:
+            The AdaptiveTokenBudget, whose report() shows the budget saved
+        """
+        from .token_budget import AdaptiveTokenBudget
+        self.token_budget = AdaptiveTokenBudget(tracker, **kwargs)
+        return self.token_budget
+    
+    def enable_prompt_compaction(self, **kwargs):
+        """
+        Compact every prompt before it is sent.
+        
+        Each response then carries a 'compaction' entry from
+        utils.calculate_savings(), which CostTracker.add_call() totals.
+        
+        Args:
+            **kwargs: Passed to PromptCompactor to toggle individual rules
+        
+        Returns:
+            The PromptCompactor
+        """
+        from .prompt_compaction import PromptCompactor
+        self.prompt_compactor = PromptCompactor(**kwargs)
+        return self.prompt_compactor
+    
+    def enable_semantic_cache(self, **kwargs):
+        """
+        Serve near-duplicate prompts from a local LSH response cache.
+        
+        By default only temperature=0 calls are cached; pass templates={...}
+        to restrict caching to calls tagged with those template names.
+        
+        Args:
+            **kwargs: Passed to NearDuplicateCache (threshold, templates, ...)
+        
+        Returns:
+            The NearDuplicateCache, whose report() shows hit and false-hit rates
+        """
+        from .semantic_cache import NearDuplicateCache
+        self.semantic_cache = NearDuplicateCache(**kwargs)
+        return self.semantic_cache
+    
+    def generate_consensus(
+        self,
+        prompt: str,
+        n: int = 5,
+        extractor: Optional[Callable[[str], Optional[str]]] = None,
+        majority: float = 0.5,
+        max_workers: Optional[int] = None,
+        wait_in_flight: bool = True,
+        system: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        use_claude: bool = None
+    ) -> Dict[str, Any]:
+        """
+        Self-consistency: sample the prompt several times and vote on the answer.
+        
+        Only as many samples are kept in flight as could still settle the
+        vote (at most max_workers); more are issued as samples finish. As soon
+        as the leading answer can no longer be beaten (it holds more than
+        `majority` of the n votes, or its lead exceeds the samples not yet
+        finished) no further samples are issued, so a unanimous run of n=5
+        sends only 3 requests.
+        
+        Args:
+            prompt: The user prompt (should ask for step-by-step reasoning)
+            n: Number of samples
+            extractor: Function mapping a response text to its final answer;
+                None means the sample abstains. Defaults to extract_final_answer
+            majority: Fraction of n votes that settles the vote early (0.5-1)
+            max_workers: Parallel requests (default: half of n, rounded up)
+            wait_in_flight: After an early stop, wait for samples already sent
+                so their tokens are included in 'usage'
+            system: System prompt (optional)
+            model: Override default model
+            temperature: Sampling temperature (must be > 0 for diversity)
+            max_tokens: Maximum response length per sample
+            use_claude: For hybrid path, explicitly choose Claude
+        
+        Returns:
+            Dictionary with 'answer', 'votes', 'samples', 'stopped_early',
+            'responses', 'model', summed 'usage' and 'in_flight' (samples
+            sent but not waited for, so missing from 'usage') keys
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        if not 0.5 <= majority <= 1:
+            raise ValueError("majority must be between 0.5 and 1 for an early stop to be final")
+        
+        if extractor is None:
+            from .utils import extract_final_answer
+            extractor = extract_final_answer
+        
+        required = int(majority * n) + 1
+        workers = max_workers or math.ceil(n / 2)
+        votes = Counter()
+        responses = []
+        errors = []
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        stopped_early = False
+        issued = 0
+        finished = 0
+        in_flight = set()
+        
+        def votes_to_settle():
+            # Fewest further samples that could end the vote if all agree with the leader
+            ranked = votes.most_common(2)
+            leader = ranked[0][1] if ranked else 0
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0
+            remaining = n - finished
+            return min(required - leader, (remaining - leader + runner_up) // 2 + 1)
+        
+        def add_usage(response):
+            if "error" in response:
+                errors.append(response["error"])
+                return False
+            usage["input_tokens"] += response["usage"]["input_tokens"]
+            usage["output_tokens"] += response["usage"]["output_tokens"]
+            return True
+        
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            while True:
+                wanted = min(workers, votes_to_settle())
+                while len(in_flight) < wanted and issued < n:
+                    in_flight.add(executor.submit(
+                        self.generate, prompt, system, model, temperature, max_tokens, use_claude
+                    ))
+                    issued += 1
+                if not in_flight:
+                    break
+                
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished += 1
+                    response = future.result()
+                    if not add_usage(response):
+                        continue
+                    responses.append(response["content"])
+                    model = response["model"]
+                    
+                    answer = extractor(response["content"])
+                    if answer is not None:
+                        votes[answer] += 1
+                
+                ranked = votes.most_common(2)
+                remaining = n - finished
+                if ranked and remaining:
+                    leader = ranked[0][1]
+                    runner_up = ranked[1][1] if len(ranked) > 1 else 0
+                    if leader >= required or leader - runner_up > remaining:
+                        stopped_early = True
+                        break
+            
+            # Samples already sent are paid for; count them (they don't vote)
+            if in_flight and wait_in_flight:
+                for future in wait(in_flight).done:
+                    add_usage(future.result())
+                in_flight = set()
+        finally:
+            executor.shutdown(wait=False)
+        
+        if not responses:
+            return {"error": errors[0] if errors else "No samples completed", "model": model}
+        
+        return {
+            "answer": votes.most_common(1)[0][0] if votes else None,
+            "votes": dict(votes),
+            "samples": len(responses),
+            "stopped_early": stopped_early,
+            "responses": responses,
+            "model": model,
+            "usage": usage,
+            "in_flight": len(in_flight)
+        }
     
     def _generate_claude(
         self,
@@ -122,7 +382,7 @@ class LLMClient:
         model: str,
         temperature: float,
         max_tokens: int
-    ) -> Dict[str, Any]:
+    ) -> LLMResponse:
         """Generate response using Claude API"""
         try:
             messages = [{"role": "user", "content": prompt}]
@@ -139,17 +399,17 @@ class LLMClient:
             
             response = self.claude_client.messages.create(**kwargs)
             
-            return {
-                "content": response.content[0].text,
-                "model": response.model,
-                "usage": {
+            return LLMResponse(
+                content=response.content[0].text,
+                model=response.model,
+                usage={
                     "input_tokens": response.usage.input_tokens,
                     "output_tokens": response.usage.output_tokens
                 },
-                "stop_reason": response.stop_reason
-            }
+                stop_reason=response.stop_reason
+            )
         except Exception as e:
-            return {"error": str(e), "model": model}
+            return LLMResponse(error=str(e), model=model)
     
     def _generate_ollama(
         self,
@@ -158,7 +418,7 @@ class LLMClient:
         model: str,
         temperature: float,
         max_tokens: int
-    ) -> Dict[str, Any]:
+    ) -> LLMResponse:
         """Generate response using Ollama"""
         try:
             # Combine system and user prompt for Ollama
@@ -182,7 +442,9 @@ class LLMClient:
             )
             
             if response.status_code == 200:
-                data = response.json()
+                # Skip decoding the bulky 'context' token array; it stays
+                # available lazily as response.context
+                data, raw_context = decode_ollama_body(response.content)
                 # Some models (e.g. Qwen 3.5) are "thinking" models where the
                 # actual answer is in the 'response' field but thinking tokens
                 # go to a separate 'thinking' field. If 'response' is empty,
@@ -190,20 +452,21 @@ class LLMClient:
                 content = data.get('response', '') or ''
                 if not content.strip() and data.get('thinking'):
                     content = data['thinking']
-                return {
-                    "content": content,
-                    "model": model,
-                    "usage": {
+                return LLMResponse.with_context(
+                    raw_context,
+                    content=content,
+                    model=model,
+                    usage={
                         "input_tokens": data.get('prompt_eval_count', 0),
                         "output_tokens": data.get('eval_count', 0)
                     },
-                    "stop_reason": "complete"
-                }
+                    stop_reason="max_tokens" if data.get('done_reason') == "length" else "complete"
+                )
             else:
-                return {"error": f"HTTP {response.status_code}", "model": model}
+                return LLMResponse(error=f"HTTP {response.status_code}", model=model)
                 
         except Exception as e:
-            return {"error": str(e), "model": model}
+            return LLMResponse(error=str(e), model=model)
     
     def get_available_models(self) -> List[str]:
         """Get list of available models"""
@@ -0,0 +1,248 @@
+"""
+Prompt Compaction
+
+Shrinks prompts before they are sent, without a model call: collapses
+whitespace, removes filler phrases, drops repeated context blocks, minifies
+embedded JSON and strips redundant CO-STAR sections.
+"""
+
+import json
+import re
+from typing import List, Optional, Tuple
+
+
+_FENCE = re.compile(r"```[^\n]*\n.*?```", re.DOTALL)
+_JSON_FENCE = re.compile(r"```json[ \t]*\n(.*?)\n?```", re.DOTALL | re.IGNORECASE)
+
+_COSTAR_SECTION = re.compile(
+    r"^# (Context|Objective|Style|Tone|Audience|Response Format)[ \t]*\n(.*?)(?=^# |\Z)",
+    re.MULTILINE | re.DOTALL
+)
+
+# Filler lead-ins, only stripped at the start of a sentence; the next word is kept
+_BOILERPLATE = re.compile(
+    r"(^|(?<=[.!?])[ \t]+)"
+    r"(please note that|it is important to note that|it should be noted that|"
+    r"i would like you to|i want you to|could you please|can you please|"
+    r"as an ai language model,)[ \t]+(\w)",
+    re.IGNORECASE | re.MULTILINE
+)
+# Thanks, only stripped when it is a sentence of its own
+_THANKS = re.compile(
+    r"(^|(?<=[.!?])[ \t]+)"
+    r"(?:thanks|thank you)(?: so much| very much)?(?: in advance)?\b(?:[.!]+|[ \t]*$)",
+    re.IGNORECASE | re.MULTILINE
+)
+# JSON string literals (kept verbatim) and whitespace (dropped) when minifying
+_JSON_STRING_OR_SPACE = re.compile(r'("(?:[^"\\]|\\.)*")|\s+')
+# Quoted spans are content for the model to work on and are never rewritten
+_QUOTED = re.compile(r'"[^"\n]*"|\u201c[^\u201d\n]*\u201d|(?<!\w)\'[^\'\n]*\'(?!\w)')
+
+# Repeated paragraphs shorter than this are kept (headings, separators)
+_MIN_DEDUPE_LENGTH = 40
+
+
+class PromptCompactor:
+    """Rule-based prompt compaction"""
+
+    def __init__(
+        self,
+        whitespace: bool = True,
+        boilerplate: bool = True,
+        dedupe: bool = True,
+        minify_json: bool = True,
+        costar: bool = True
+    ):
+        """
+        Initialize the compactor.
+
+        Args:
+            whitespace: Collapse runs of spaces and blank lines
+            boilerplate: Remove filler phrases ("Please note that", ...)
+            dedupe: Drop paragraphs that repeat an earlier one
+            minify_json: Remove whitespace from embedded JSON (tokens are kept
+                as written, so numbers and duplicate keys are unchanged)
+            costar: Drop empty/duplicate CO-STAR sections and sections
+                already stated in the system prompt
+        """
+        self.whitespace = whitespace
+        self.boilerplate = boilerplate
+        self.dedupe = dedupe
+        self.minify_json = minify_json
+        self.costar = costar
+
+    def compact(self, prompt: str, system: Optional[str] = None) -> str:
+        """
+        Compact a prompt.
+
+        Fenced code blocks are left untouched, except that ```json blocks
+        are minified.
+
+        Args:
+            prompt: The user prompt
+            system: System prompt the user prompt will be sent with (optional)
+
+        Returns:
+            Compacted prompt
+        """
+        if self.costar:
+            prompt = self._strip_costar(prompt, system)
+
+        seen = set()
+        pieces = []
+        for is_code, text in self._split_fences(prompt):
+            if is_code:
+                if self.minify_json:
+                    text = _JSON_FENCE.sub(self._minify_json_fence, text)
+            else:
+                if self.minify_json:
+                    text = self._minify_inline_json(text)
+                if self.boilerplate:
+                    text = self._strip_boilerplate(text)
+                if self.whitespace:
+                    text = re.sub(r"(?<=\S)[ \t]{2,}", " ", text)
+                    text = re.sub(r"[ \t]+\n", "\n", text)
+                    text = re.sub(r"\n{3,}", "\n\n", text)
+            if self.dedupe:
+                text = self._dedupe(text, seen, is_code)
+            pieces.append(text)
+
+        result = "".join(pieces)
+        return result.strip() if self.whitespace else result
+
+    @staticmethod
+    def _split_fences(text: str) -> List[Tuple[bool, str]]:
+        """Split text into (is_code, text) parts around fenced code blocks"""
+        parts = []
+        pos = 0
+        for match in _FENCE.finditer(text):
+            parts.append((False, text[pos:match.start()]))
+            parts.append((True, match.group(0)))
+            pos = match.end()
+        parts.append((False, text[pos:]))
+        return parts
+
+    @staticmethod
+    def _strip_boilerplate(text: str) -> str:
+        """Remove filler lead-ins and standalone thanks outside quoted spans"""
+        quoted = [m.span() for m in _QUOTED.finditer(text)]
+
+        def in_quotes(match) -> bool:
+            return any(start <= match.end(1) < end for start, end in quoted)
+
+        def lead_in(match) -> str:
+            if in_quotes(match):
+                return match.group(0)
+            word = match.group(3)
+            if match.group(2)[0].isupper():
+                word = word[0].upper() + word[1:]
+            return match.group(1) + word
+
+        def thanks(match) -> str:
+            return match.group(0) if in_quotes(match) else ""
+
+        text = _BOILERPLATE.sub(lead_in, text)
+        # Spans shift after the first pass
+        quoted = [m.span() for m in _QUOTED.finditer(text)]
+        return _THANKS.sub(thanks, text)
+
+    @staticmethod
+    def _minify_json(text: str) -> str:
+        """Drop whitespace outside string literals from valid JSON text"""
+        return _JSON_STRING_OR_SPACE.sub(lambda m: m.group(1) or "", text)
+
+    @classmethod
+    def _minify_json_fence(cls, match) -> str:
+        """Minify the body of a ```json fence if it parses"""
+        try:
+            json.loads(match.group(1))
+        except ValueError:
+            return match.group(0)
+        return "```json\n" + cls._minify_json(match.group(1)) + "\n```"
+
+    @classmethod
+    def _minify_inline_json(cls, text: str) -> str:
+        """Minify JSON objects/arrays embedded in prose"""
+        decoder = json.JSONDecoder()
+        out = []
+        pos = 0
+        i = 0
+        while i < len(text):
+            if text[i] in "{[":
+                try:
+                    data, end = decoder.raw_decode(text, i)
+                except ValueError:
+                    i += 1
+                    continue
+                if isinstance(data, (dict, list)):
+                    out.append(text[pos:i])
+                    out.append(cls._minify_json(text[i:end]))
+                    pos = i = end
+                    continue
+            i += 1
+        out.append(text[pos:])
+        return "".join(out)
+
+    @staticmethod
+    def _dedupe(text: str, seen: set, is_code: bool) -> str:
+        """Drop paragraphs (or whole code blocks) already seen"""
+        if is_code:
+            key = text.strip()
+            if key in seen:
+                return ""
+            seen.add(key)
+            return text
+
+        paragraphs = re.split(r"(\n\s*\n)", text)
+        kept = []
+        for i in range(0, len(paragraphs), 2):
+            paragraph = paragraphs[i]
+            key = " ".join(paragraph.split()).lower()
+            if len(key) >= _MIN_DEDUPE_LENGTH:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(paragraph)
+            if i + 1 < len(paragraphs):
+                kept.append(paragraphs[i + 1])
+        return "".join(kept)
+
+    @staticmethod
+    def _strip_costar(prompt: str, system: Optional[str]) -> str:
+        """Remove empty, repeated and system-duplicated CO-STAR sections"""
+        sections = list(_COSTAR_SECTION.finditer(prompt))
+        if len(sections) < 2:
+            return prompt
+
+        system_lines = {line.strip() for line in system.splitlines()} if system else set()
+        seen = set()
+        out = []
+        pos = 0
+        for match in sections:
+            # Keep any text between sections (e.g. other markdown headings)
+            out.append(prompt[pos:match.start()])
+            pos = match.end()
+
+            heading, value = match.group(1), match.group(2).strip()
+            if not value or (heading, value) in seen:
+                continue
+            if f"{heading}: {value}" in system_lines:
+                continue
+            seen.add((heading, value))
+            out.append(match.group(0))
+        out.append(prompt[pos:])
+        return "".join(out)
+
+
+def compact_prompt(prompt: str, system: Optional[str] = None) -> str:
+    """
+    Compact a prompt with all rules enabled.
+
+    Args:
+        prompt: The user prompt
+        system: System prompt the user prompt will be sent with (optional)
+
+    Returns:
+        Compacted prompt
+    """
+    return PromptCompactor().compact(prompt, system)
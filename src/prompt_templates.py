@@ -4,7 +4,26 @@ Prompt Templates
 Pre-built templates for CO-STAR framework and common use cases.
 """
 
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# CO-STAR fields in canonical order, with their section headings
+COSTAR_SECTIONS = (
+    ("context", "Context"),
+    ("objective", "Objective"),
+    ("style", "Style"),
+    ("tone", "Tone"),
+    ("audience", "Audience"),
+    ("response_format", "Response Format"),
+)
+
+# Same defaults as COSTARTemplate.build()
+COSTAR_DEFAULTS = {
+    "style": "professional",
+    "tone": "helpful",
+    "audience": "general",
+    "response_format": "text",
+}
 
 
 class COSTARTemplate:
@@ -53,6 +72,22 @@ class COSTARTemplate:
 """
         return prompt
     
+    @staticmethod
+    def compile(variable: Iterable[str] = (), **static_fields) -> "CompiledCOSTARTemplate":
+        """
+        Compile a reusable CO-STAR template.
+        
+        Args:
+            variable: Defaulted fields (style, tone, audience, response_format)
+                to leave per-call instead of binding their defaults
+            **static_fields: Fields that stay the same for every prompt
+                (e.g. style, tone, audience, response_format)
+        
+        Returns:
+            CompiledCOSTARTemplate with the static fields bound
+        """
+        return CompiledCOSTARTemplate(variable=variable, **static_fields)
+    
     @staticmethod
     def build_system(
         style: str = "professional",
@@ -79,59 +114,198 @@ Response Format: {response_format}
 Follow these guidelines in all responses."""
 
 
-class PromptLibrary:
-    """Library of pre-built prompts for common tasks"""
+class CompiledCOSTARTemplate:
+    """
+    CO-STAR template compiled once and rendered many times.
+    
+    Bound (static) sections are rendered a single time into a prefix that
+    comes first in every prompt; the remaining sections follow as the
+    variable suffix. Prompts built from the same template therefore share
+    an identical prefix, which lets backend prompt caches hit.
+    
+    Defaulted fields that are not passed are bound to the same defaults as
+    COSTARTemplate.build(), so they join the prefix too. Fields listed in
+    `variable` stay per-call (still defaulting when omitted); with all four
+    listed and nothing bound, the output matches build() exactly.
+    """
+    
+    def __init__(self, variable: Iterable[str] = (), **bound: str):
+        """
+        Compile the template.
+        
+        Args:
+            variable: Defaulted fields to keep per-call instead of binding
+            **bound: CO-STAR fields fixed for every render
+        """
+        variable = set(variable)
+        known = {field for field, _ in COSTAR_SECTIONS}
+        unknown = (set(bound) | variable) - known
+        if unknown:
+            raise ValueError(f"Unknown CO-STAR fields: {sorted(unknown)}")
+        
+        self.bound = {
+            **{f: v for f, v in COSTAR_DEFAULTS.items() if f not in variable},
+            **bound
+        }
+        bound = self.bound
+        self.variable_fields = tuple(f for f, _ in COSTAR_SECTIONS if f not in bound)
+        
+        static_sections = [f"# {title}\n{bound[f]}\n" for f, title in COSTAR_SECTIONS if f in bound]
+        self._headers = tuple(f"# {title}\n" for f, title in COSTAR_SECTIONS if f not in bound)
+        
+        self.prefix = "\n".join(static_sections)
+        if static_sections and self._headers:
+            self.prefix += "\n"
+    
+    def partial(self, **fields: str) -> "CompiledCOSTARTemplate":
+        """
+        Bind more fields, returning a new compiled template.
+        
+        Args:
+            **fields: Additional CO-STAR fields to fix
+        
+        Returns:
+            New CompiledCOSTARTemplate
+        """
+        variable = [f for f in self.variable_fields if f in COSTAR_DEFAULTS]
+        return CompiledCOSTARTemplate(variable=variable, **{**self.bound, **fields})
+    
+    def render(self, **fields: str) -> str:
+        """
+        Render a prompt.
+        
+        Args:
+            **fields: Values for the unbound fields; variable style, tone,
+                audience and response_format default as in COSTARTemplate.build()
+        
+        Returns:
+            Formatted prompt
+        """
+        return self.prefix + self._suffix(self._values(fields))
+    
+    def render_parts(self, **fields: str) -> Tuple[str, str]:
+        """
+        Render a prompt as (stable prefix, variable suffix).
+        
+        Args:
+            **fields: Values for every unbound field
+        
+        Returns:
+            Tuple of prefix and suffix; prefix + suffix == render(**fields)
+        """
+        return self.prefix, self._suffix(self._values(fields))
+    
+    def render_many(self, rows: Iterable[Dict[str, str]]) -> List[str]:
+        """
+        Render many prompts for bulk jobs.
+        
+        Args:
+            rows: Dictionaries of values for the unbound fields
+        
+        Returns:
+            List of formatted prompts, in input order
+        """
+        prefix = self.prefix
+        suffix = self._suffix
+        values = self._values
+        return [prefix + suffix(values(row)) for row in rows]
+    
+    def _values(self, fields: Dict[str, str]) -> Tuple[str, ...]:
+        """Order field values to match the unbound sections, applying defaults"""
+        try:
+            values = tuple(
+                fields[f] if f in fields else COSTAR_DEFAULTS[f]
+                for f in self.variable_fields
+            )
+        except KeyError as e:
+            raise TypeError(f"Missing CO-STAR field: {e.args[0]}") from None
+        extra = set(fields).difference(self.variable_fields)
+        if extra:
+            raise TypeError(f"Unexpected or already bound fields: {sorted(extra)}")
+        return values
     
-    RESEARCH_ASSISTANT = COSTARTemplate.build(
+    def _suffix(self, values: Tuple[str, ...]) -> str:
+        """Join the variable sections"""
+        return "\n".join(f"{header}{value}\n" for header, value in zip(self._headers, values))
+
+
+# Fields behind each PromptLibrary template
+_LIBRARY_SPECS = {
+    "RESEARCH_ASSISTANT": dict(
         context="You are helping a researcher gather and analyze information.",
         objective="Find relevant information and synthesize it clearly.",
         style="academic but accessible",
         tone="objective and thorough",
         audience="researcher or student",
         response_format="structured with sources cited"
-    )
-    
-    CODE_REVIEWER = COSTARTemplate.build(
+    ),
+    "CODE_REVIEWER": dict(
         context="You are reviewing code for quality, bugs, and best practices.",
         objective="Identify issues and suggest improvements.",
         style="technical and precise",
         tone="constructive and educational",
         audience="software developer",
         response_format="list of findings with code examples"
-    )
-    
-    CREATIVE_WRITER = COSTARTemplate.build(
+    ),
+    "CREATIVE_WRITER": dict(
         context="You are helping with creative writing and storytelling.",
         objective="Generate engaging, original content.",
         style="creative and expressive",
         tone="inspiring and imaginative",
         audience="writers and creatives",
         response_format="narrative prose"
-    )
-    
-    DATA_ANALYST = COSTARTemplate.build(
+    ),
+    "DATA_ANALYST": dict(
         context="You are analyzing data and extracting insights.",
         objective="Find patterns, trends, and actionable insights.",
         style="analytical and data-driven",
         tone="objective and precise",
         audience="business stakeholders",
         response_format="structured analysis with key findings"
-    )
-    
-    TUTOR = COSTARTemplate.build(
+    ),
+    "TUTOR": dict(
         context="You are teaching a concept to a student.",
         objective="Explain clearly and verify understanding.",
         style="educational and patient",
         tone="encouraging and supportive",
         audience="student or learner",
         response_format="explanations with examples and questions"
-    )
+    ),
+}
+
+
+class PromptLibrary:
+    """Library of pre-built prompts for common tasks"""
+    
+    RESEARCH_ASSISTANT = COSTARTemplate.build(**_LIBRARY_SPECS["RESEARCH_ASSISTANT"])
+    CODE_REVIEWER = COSTARTemplate.build(**_LIBRARY_SPECS["CODE_REVIEWER"])
+    CREATIVE_WRITER = COSTARTemplate.build(**_LIBRARY_SPECS["CREATIVE_WRITER"])
+    DATA_ANALYST = COSTARTemplate.build(**_LIBRARY_SPECS["DATA_ANALYST"])
+    TUTOR = COSTARTemplate.build(**_LIBRARY_SPECS["TUTOR"])
+    
+    _compiled: Dict[str, CompiledCOSTARTemplate] = {}
     
     @classmethod
     def get_template(cls, name: str) -> Optional[str]:
         """Get a template by name"""
         return getattr(cls, name.upper(), None)
     
+    @classmethod
+    def get_compiled(cls, name: str) -> Optional[CompiledCOSTARTemplate]:
+        """
+        Get a compiled template with everything but the objective bound.
+        
+        Render with .render(objective=...) so all prompts from the same
+        template share the persona sections as a stable prefix.
+        """
+        key = name.upper()
+        if key not in _LIBRARY_SPECS:
+            return None
+        if key not in cls._compiled:
+            static = {k: v for k, v in _LIBRARY_SPECS[key].items() if k != "objective"}
+            cls._compiled[key] = CompiledCOSTARTemplate(**static)
+        return cls._compiled[key]
+    
     @classmethod
     def list_templates(cls) -> list:
         """List all available templates"""
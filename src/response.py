@@ -0,0 +1,88 @@
+"""
+LLM Response Type
+
+Response type returned by LLMClient.generate(), plus a JSON decoder for the
+Ollama /api/generate body that skips the bulky 'context' token array.
+"""
+
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # Optional speedup (see requirements.txt); fall back to the standard library
+    _loads = json.loads
+
+
+# Ollama returns the whole conversation as token ids; we never send it back
+_CONTEXT_KEY = b',"context":['
+
+
+def decode_ollama_body(body: bytes) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """
+    Decode an /api/generate response body without parsing 'context'.
+
+    The 'context' token array is cut out of the raw bytes before decoding.
+    An unescaped quote cannot appear inside a JSON string, so the key
+    pattern only matches the real field.
+
+    Args:
+        body: Raw response body
+
+    Returns:
+        Tuple of (decoded fields, raw 'context' array bytes or None)
+    """
+    start = body.find(_CONTEXT_KEY)
+    if start == -1:
+        return _loads(body), None
+
+    array_start = start + len(_CONTEXT_KEY) - 1
+    end = body.find(b"]", array_start) + 1
+    return _loads(body[:start] + body[end:]), body[array_start:end]
+
+
+class LLMResponse(dict):
+    """
+    Response from LLMClient.generate().
+    
+    A plain dict subclass (same keys as before, json/pickle/copy friendly)
+    with no Python-level __init__, so construction runs at dict speed. The
+    one slot holds Ollama's 'context' token array: raw bytes until
+    .context is first read, then the decoded list.
+    """
+
+    __slots__ = ("_context",)
+
+    @classmethod
+    def with_context(cls, raw_context: Optional[bytes], **fields: Any) -> "LLMResponse":
+        """
+        Create a response carrying undecoded Ollama 'context' bytes.
+
+        Args:
+            raw_context: Raw 'context' array from decode_ollama_body(), or None
+            **fields: Response keys ('content', 'model', 'usage', ...)
+
+        Returns:
+            LLMResponse
+        """
+        response = cls(fields)
+        response._context = raw_context
+        return response
+
+    @property
+    def context(self) -> Optional[List[int]]:
+        """Ollama conversation context token ids, decoded once on first access"""
+        value = getattr(self, "_context", None)
+        if isinstance(value, bytes):
+            value = self._context = _loads(value)
+        return value
+
+    def copy(self) -> "LLMResponse":
+        """Shallow copy that keeps the response type and context"""
+        response = LLMResponse(self)
+        response._context = getattr(self, "_context", None)
+        return response
+
+    def __repr__(self) -> str:
+        return f"LLMResponse({dict.__repr__(self)})"
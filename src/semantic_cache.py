@@ -0,0 +1,314 @@
+"""
+Near-Duplicate Response Cache
+
+Serves cached LLM responses for prompts that are nearly identical to an
+earlier one (whitespace, casing, prose punctuation, full timestamps, small
+rewordings). Prompts are
+normalized, shingled and signed with one-permutation MinHash, then indexed
+with banded locality-sensitive hashing; hits are confirmed on the exact
+Jaccard similarity of the stored shingle sets. Everything runs in-process:
+no embedding model or network call is involved.
+"""
+
+import random
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, FrozenSet, List, Any, Optional, Set, Tuple
+
+
+_MASK64 = (1 << 64) - 1
+
+# Volatile substrings replaced by placeholders before hashing. Only full
+# ISO timestamps (date plus time of day) qualify; bare dates, times and long
+# numbers are usually the subject of the question (weekdays, order ids, ...)
+_VOLATILE_PATTERNS = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?(?![\w:])"), " <timestamp> "),
+]
+# Placeholders, decimals, words, and any symbol except prose punctuation,
+# so "2+2", "2*2" and "2-2" stay different
+_TOKEN = re.compile(r"<\w+>|\d+(?:\.\d+)+|\w+|[^\w\s.,;:!?'\"]")
+
+
+def normalize_prompt(prompt: str) -> List[str]:
+    """
+    Normalize a prompt into a list of tokens.
+
+    Lowercases, replaces full timestamps with a placeholder and drops
+    whitespace and prose punctuation differences. Operators and other
+    symbols are kept as tokens.
+
+    Args:
+        prompt: Raw prompt text
+
+    Returns:
+        List of normalized tokens
+    """
+    text = prompt.lower()
+    for pattern, placeholder in _VOLATILE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return _TOKEN.findall(text)
+
+
+class NearDuplicateCache:
+    """LSH-indexed cache for near-duplicate prompts"""
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        max_entries: int = 1_000_000,
+        max_bucket_size: int = 64,
+        max_candidates: int = 8,
+        templates: Optional[Set[str]] = None,
+        deterministic_only: bool = True,
+        audit_rate: float = 0.0
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum Jaccard similarity of prompt shingles for a hit (0-1)
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must be divisible by bands)
+            shingle_size: Words per shingle
+            max_entries: Oldest entries are evicted beyond this
+            max_bucket_size: Buckets holding more entries than this are skipped
+                by lookups until eviction shrinks them; they only hold text
+                shared by many prompts (e.g. a template prefix) and would
+                make lookups scan everything
+            max_candidates: Candidates (most shared buckets first) whose exact
+                similarity is checked per lookup
+            templates: Only cache calls tagged with one of these templates
+                (None allows untagged calls too)
+            deterministic_only: Only cache temperature == 0 calls
+            audit_rate: Fraction of hits re-generated to measure false hits
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.max_bucket_size = max_bucket_size
+        self.max_candidates = max_candidates
+        self.templates = set(templates) if templates is not None else None
+        self.deterministic_only = deterministic_only
+        self.audit_rate = audit_rate
+
+        # entry id -> (scope, signature, shingle hashes, response)
+        self._entries: "OrderedDict[int, Tuple[Tuple, Tuple[int, ...], FrozenSet[int], Dict[str, Any]]]" = OrderedDict()
+        # Bucket key -> entry ids (a dict used as an insertion-ordered set)
+        self._buckets: Dict[Tuple, Dict[int, None]] = {}
+        # (scope, shingle hashes) -> entry id, for exact normalized repeats
+        self._exact: Dict[Tuple, int] = {}
+        self._next_id = 0
+        self._lock = threading.RLock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_seconds = 0.0
+        self.audited_hits = 0
+        self.false_hits = 0
+
+    def is_eligible(self, temperature: float, template: Optional[str]) -> bool:
+        """Check whether a call may be served from / stored in the cache"""
+        if self.deterministic_only and temperature != 0:
+            return False
+        if self.templates is not None and template not in self.templates:
+            return False
+        return True
+
+    def shingles(self, prompt: str) -> FrozenSet[int]:
+        """
+        Hash the normalized word shingles of a prompt.
+
+        Args:
+            prompt: Raw prompt text
+
+        Returns:
+            Frozen set of 64-bit shingle hashes
+        """
+        tokens = normalize_prompt(prompt)
+        k = self.shingle_size
+        if len(tokens) <= k:
+            return frozenset([hash(" ".join(tokens)) & _MASK64])
+        return frozenset(
+            hash(" ".join(tokens[i:i + k])) & _MASK64 for i in range(len(tokens) - k + 1)
+        )
+
+    def signature(self, shingles: FrozenSet[int]) -> Tuple[int, ...]:
+        """
+        Compute a one-permutation MinHash signature.
+
+        Each shingle hash is routed to one of num_perm bins; empty bins
+        borrow from the next non-empty bin. The signature is only used to
+        find candidates; hits are decided on exact Jaccard similarity.
+
+        Args:
+            shingles: Output of shingles()
+
+        Returns:
+            Tuple of num_perm integers
+        """
+        n = self.num_perm
+        bins = [_MASK64] * n
+        for h in shingles:
+            slot = h % n
+            value = h // n
+            if value < bins[slot]:
+                bins[slot] = value
+
+        # Densify: fill each empty bin from the next filled bin (wrapping
+        # around), offset by the distance so borrowed values stay distinct
+        if _MASK64 in bins:
+            source = max(i for i, v in enumerate(bins) if v != _MASK64)
+            value, j = bins[source], source
+            for step in range(1, n):
+                i = (source - step) % n
+                if bins[i] == _MASK64:
+                    bins[i] = value + (j - i) % n
+                else:
+                    value, j = bins[i], i
+        return tuple(bins)
+
+    def _band_keys(self, scope: Tuple, signature: Tuple[int, ...]) -> List[Tuple]:
+        """LSH bucket keys for a signature within a scope"""
+        r = self.rows
+        return [(scope, b, signature[b * r:(b + 1) * r]) for b in range(self.bands)]
+
+    @staticmethod
+    def _jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+        """Exact Jaccard similarity of two shingle sets"""
+        common = len(a & b)
+        return common / (len(a) + len(b) - common)
+
+    def lookup(self, prompt: str, scope: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached response for a near-duplicate prompt.
+
+        Args:
+            prompt: Raw prompt text
+            scope: Exact-match part of the key (model, system, template, ...)
+
+        Returns:
+            Cached response with a 'similarity' key, or None
+        """
+        start = time.perf_counter()
+        shingles = self.shingles(prompt)
+        signature = self.signature(shingles)
+
+        with self._lock:
+            self.lookups += 1
+            best_id, best_sim = self._exact.get((scope, shingles)), 1.0
+
+            if best_id is None:
+                best_sim = 0.0
+                collisions = Counter()
+                for key in self._band_keys(scope, signature):
+                    bucket = self._buckets.get(key)
+                    if bucket and len(bucket) <= self.max_bucket_size:
+                        collisions.update(bucket.keys())
+                for entry_id, _ in collisions.most_common(self.max_candidates):
+                    sim = self._jaccard(shingles, self._entries[entry_id][2])
+                    if sim > best_sim:
+                        best_id, best_sim = entry_id, sim
+
+            result = None
+            if best_id is not None and best_sim >= self.threshold:
+                self.hits += 1
+                result = self._entries[best_id][3].copy()
+                result["similarity"] = best_sim
+
+            self.lookup_seconds += time.perf_counter() - start
+        return result
+
+    def store(self, prompt: str, scope: Tuple, response: Dict[str, Any]):
+        """
+        Store a response.
+
+        Args:
+            prompt: Raw prompt text
+            scope: Exact-match part of the key
+            response: Response from LLMClient.generate()
+        """
+        shingles = self.shingles(prompt)
+        signature = self.signature(shingles)
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+
+            self._entries[entry_id] = (scope, signature, shingles, response)
+            self._exact[(scope, shingles)] = entry_id
+            for key in self._band_keys(scope, signature):
+                self._buckets.setdefault(key, {})[entry_id] = None
+
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Remove the oldest entry (caller holds the lock)"""
+        entry_id, (scope, signature, shingles, _) = self._entries.popitem(last=False)
+        if self._exact.get((scope, shingles)) == entry_id:
+            del self._exact[(scope, shingles)]
+        for key in self._band_keys(scope, signature):
+            bucket = self._buckets.get(key)
+            if bucket is None or entry_id not in bucket:
+                continue
+            del bucket[entry_id]
+            if not bucket:
+                del self._buckets[key]
+
+    def should_audit(self) -> bool:
+        """Decide whether to verify the current hit against a fresh generation"""
+        return self.audit_rate > 0 and random.random() < self.audit_rate
+
+    def record_audit(self, cached_content: str, fresh_content: str):
+        """
+        Record the outcome of an audited hit.
+
+        A hit counts as false when the fresh output differs from the cached one
+        after normalization.
+        """
+        mismatch = normalize_prompt(cached_content) != normalize_prompt(fresh_content)
+        with self._lock:
+            self.audited_hits += 1
+            if mismatch:
+                self.false_hits += 1
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Get cache statistics as dictionary"""
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0,
+            "mean_lookup_ms": self.lookup_seconds / self.lookups * 1000 if self.lookups else 0,
+            "audited_hits": self.audited_hits,
+            "false_hits": self.false_hits,
+            "false_hit_rate": self.false_hits / self.audited_hits if self.audited_hits else None
+        }
+
+    def report(self):
+        """Print cache statistics"""
+        summary = self.get_summary()
+        print("=" * 60)
+        print("🗄️  NEAR-DUPLICATE CACHE REPORT")
+        print("=" * 60)
+        print(f"Entries: {summary['entries']:,}")
+        print(f"Lookups: {summary['lookups']:,}")
+        print(f"Hits: {summary['hits']:,} ({summary['hit_rate'] * 100:.1f}%)")
+        print(f"Mean lookup: {summary['mean_lookup_ms']:.3f} ms")
+        if summary['false_hit_rate'] is None:
+            print("False-hit rate: not measured (set audit_rate > 0)")
+        else:
+            print(f"False-hit rate: {summary['false_hit_rate'] * 100:.1f}% "
+                  f"({summary['false_hits']}/{summary['audited_hits']} audited hits)")
+        print("=" * 60)
@@ -0,0 +1,154 @@
+"""
+Adaptive max_tokens
+
+Learns per-model / per-template output lengths from CostTracker history and
+suggests a tighter max_tokens cap than the fixed default.
+"""
+
+import bisect
+import math
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+from .cost_tracker import CostTracker
+
+
+# Stop reasons that mean the response hit the max_tokens cap
+TRUNCATED_STOP_REASONS = ("max_tokens", "length")
+
+
+class AdaptiveTokenBudget:
+    """Derive max_tokens from historical output-length statistics"""
+
+    def __init__(
+        self,
+        tracker: CostTracker,
+        percentile: float = 95.0,
+        headroom: float = 1.25,
+        min_samples: int = 10,
+        min_tokens: int = 32
+    ):
+        """
+        Initialize the budget.
+
+        Args:
+            tracker: CostTracker whose recorded calls provide the history
+            percentile: Output-length percentile to cover (0-100)
+            headroom: Multiplier applied on top of the percentile
+            min_samples: Calls needed before the cap is tightened
+            min_tokens: Never suggest a cap below this
+        """
+        self.tracker = tracker
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.min_tokens = min_tokens
+
+        self.requested_tokens = 0
+        self.reserved_tokens = 0
+        self.adapted_calls = 0
+        self.retries = 0
+
+        # Sorted output lengths per (model, template); template None = all
+        self._lengths: Dict[Tuple[str, Optional[str]], List[int]] = {}
+        self._calls = tracker.calls
+        self._seen_calls = 0
+        self._lock = threading.Lock()
+
+    def _ingest(self):
+        """Fold calls recorded since the last check into the sorted length lists"""
+        calls = self.tracker.calls
+        if calls is not self._calls:
+            # CostTracker.reset() swaps in a new list; start over
+            self._lengths.clear()
+            self._calls = calls
+            self._seen_calls = 0
+
+        for call in calls[self._seen_calls:]:
+            length = call.get('response_tokens', call['output_tokens'])
+            keys = [(call['model'], None)]
+            if call.get('template') is not None:
+                keys.append((call['model'], call['template']))
+            for key in keys:
+                bisect.insort(self._lengths.setdefault(key, []), length)
+        self._seen_calls = len(calls)
+
+    def history(self, model: str, template: Optional[str] = None) -> List[int]:
+        """
+        Get recorded output lengths for a model (and template, if given).
+
+        Args:
+            model: Model name
+            template: Template name passed to LLMClient.generate()
+
+        Returns:
+            List of output token counts
+        """
+        with self._lock:
+            self._ingest()
+            return list(self._lengths.get((model, template), []))
+
+    def suggest(self, model: str, template: Optional[str] = None, requested: int = 1024) -> int:
+        """
+        Suggest a max_tokens cap for the next call.
+
+        Args:
+            model: Model name
+            template: Template name (optional)
+            requested: max_tokens the caller asked for; the suggestion never exceeds it
+
+        Returns:
+            Suggested max_tokens
+        """
+        with self._lock:
+            self._ingest()
+            lengths = self._lengths.get((model, template), [])
+            if len(lengths) < self.min_samples:
+                return requested
+
+            # Nearest-rank percentile
+            rank = max(1, math.ceil(self.percentile / 100 * len(lengths)))
+            cap = math.ceil(lengths[rank - 1] * self.headroom)
+        return min(requested, max(self.min_tokens, cap))
+
+    def record(self, requested: int, reserved: int, retried: bool = False):
+        """
+        Record the cap used for a call.
+
+        Args:
+            requested: max_tokens the caller asked for
+            reserved: Total max_tokens sent, summed over the first attempt and any retry
+            retried: Whether the call was retried after truncation
+        """
+        with self._lock:
+            self.requested_tokens += requested
+            self.reserved_tokens += reserved
+            if reserved < requested:
+                self.adapted_calls += 1
+            if retried:
+                self.retries += 1
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Get savings summary as dictionary"""
+        saved = self.requested_tokens - self.reserved_tokens
+        return {
+            "requested_tokens": self.requested_tokens,
+            "reserved_tokens": self.reserved_tokens,
+            "saved_tokens": saved,
+            "saved_percent": (saved / self.requested_tokens * 100) if self.requested_tokens else 0,
+            "adapted_calls": self.adapted_calls,
+            "retries": self.retries
+        }
+
+    def report(self):
+        """Print how much reserved max_tokens budget was saved"""
+        summary = self.get_summary()
+        print("=" * 60)
+        print("📏 ADAPTIVE MAX_TOKENS REPORT")
+        print("=" * 60)
+        print(f"Requested max_tokens: {summary['requested_tokens']:,}")
+        print(f"Reserved max_tokens: {summary['reserved_tokens']:,}")
+        print(f"Saved: {summary['saved_tokens']:,} ({summary['saved_percent']:.1f}%)")
+        print(f"Calls with tightened cap: {summary['adapted_calls']}")
+        print(f"Retries after truncation: {summary['retries']}")
+        print("=" * 60)
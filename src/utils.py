@@ -72,10 +72,11 @@ def format_response(response: Dict[str, Any], verbose: bool = True) -> str:
     output = []
     
     if verbose:
+        usage = response['usage']
         output.append("=" * 60)
         output.append(f"Model: {response['model']}")
-        output.append(f"Tokens: {response['usage']['input_tokens']} in, "
-                     f"{response['usage']['output_tokens']} out")
+        output.append(f"Tokens: {usage['input_tokens']} in, "
+                     f"{usage['output_tokens']} out")
         output.append(f"Stop reason: {response['stop_reason']}")
         output.append("=" * 60)
     
@@ -109,6 +110,38 @@ def count_words(text: str) -> int:
     return len(text.split())
 
 
+def extract_final_answer(text: str) -> Optional[str]:
+    """
+    Pull the final answer out of a chain-of-thought response.
+    
+    Looks for an explicit "answer is"/"Answer:" marker first, then falls back
+    to the last number in the text. Used as the default vote extractor for
+    LLMClient.generate_consensus().
+    
+    Args:
+        text: Model output
+    
+    Returns:
+        Normalized answer string, or None if nothing could be extracted
+    """
+    import re
+    
+    match = None
+    for match in re.finditer(r"(?:final answer|answer is|answer:)\s*:?\s*(.+)", text, re.IGNORECASE):
+        pass
+    if match:
+        answer = match.group(1).strip().rstrip(".").strip("*").strip()
+        number = re.search(r"-?\$?\d[\d,]*(?:\.\d+)?", answer)
+        if number:
+            return number.group(0).replace(",", "").replace("$", "")
+        return answer.lower() or None
+    
+    numbers = re.findall(r"-?\d[\d,]*(?:\.\d+)?", text)
+    if numbers:
+        return numbers[-1].replace(",", "")
+    return None
+
+
 def calculate_savings(verbose_tokens: int, concise_tokens: int, model: str = "claude-sonnet-4-5-20250929") -> Dict[str, Any]:
     """
     Calculate savings from using concise prompts.
@@ -227,13 +260,15 @@ def save_task_output(
     
     # Metadata section
     if "error" not in response:
+        input_tokens = response['usage']['input_tokens']
+        output_tokens = response['usage']['output_tokens']
         content.extend([
             "## Metadata",
             "",
             f"- **Model:** {response['model']}",
-            f"- **Input tokens:** {response['usage']['input_tokens']:,}",
-            f"- **Output tokens:** {response['usage']['output_tokens']:,}",
-            f"- **Total tokens:** {response['usage']['input_tokens'] + response['usage']['output_tokens']:,}",
+            f"- **Input tokens:** {input_tokens:,}",
+            f"- **Output tokens:** {output_tokens:,}",
+            f"- **Total tokens:** {input_tokens + output_tokens:,}",
         ])
         
         if metadata:
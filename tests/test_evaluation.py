@@ -0,0 +1,81 @@
+"""Tests for src.evaluation"""
+
+import os
+
+from src.cost_tracker import CostTracker
+from src.evaluation import (
+    RESULT_COLUMNS, ModelEvaluator, build_cells, iter_results, load_completed_cells, repair_results
+)
+from src.response import LLMResponse
+
+
+HEADER = ",".join(RESULT_COLUMNS) + "\n"
+ROW_A = 'a1,p,llama3.2:3b,0.0,0,1.5,10,20,0.0,complete,"line one\nline two"\n'
+ROW_B = "b2,p,llama3.2:3b,0.0,1,1.0,10,20,0.0,complete,ok\n"
+
+
+def write(tmp_path, text):
+    path = os.path.join(tmp_path, "results.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def test_iter_results_reads_multiline_rows(tmp_path):
+    path = write(tmp_path, HEADER + ROW_A + ROW_B)
+    rows = [row for row, _ in iter_results(path)]
+    assert [row["cell_id"] for row in rows] == ["a1", "b2"]
+    assert rows[0]["output"] == "line one\nline two"
+    assert rows[1]["output_tokens"] == 20
+
+
+def test_repair_drops_row_without_newline(tmp_path):
+    path = write(tmp_path, HEADER + ROW_A + ROW_B.rstrip("\n"))
+    assert repair_results(path) == len(ROW_B) - 1
+    assert load_completed_cells(path) == {"a1"}
+
+
+def test_repair_drops_unterminated_quoted_field(tmp_path):
+    torn = 'b2,p,llama3.2:3b,0.0,1,1.0,10,20,0.0,complete,"cut off\n'
+    path = write(tmp_path, HEADER + ROW_A + torn)
+    assert repair_results(path) == len(torn)
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read() == HEADER + ROW_A
+
+
+def test_repair_keeps_complete_table(tmp_path):
+    path = write(tmp_path, HEADER + ROW_A + ROW_B)
+    assert repair_results(path) == 0
+    assert load_completed_cells(path) == {"a1", "b2"}
+
+
+def test_cell_ids_change_with_request_settings():
+    spec = {"prompts": {"p": "Say hi"}, "models": ["llama3.2:3b"]}
+    base = build_cells(spec)[0]["cell_id"]
+
+    for change in ({"prompts": {"p": "Say bye"}}, {"system": "Be brief"}, {"max_tokens": 64}):
+        assert build_cells(dict(spec, **change))[0]["cell_id"] != base
+    assert build_cells(spec)[0]["cell_id"] == base
+
+
+def test_results_bill_truncated_attempts(tmp_path):
+    class Client:
+        def generate(self, prompt, **kwargs):
+            return LLMResponse(
+                content="ok",
+                model=kwargs["model"],
+                usage={"input_tokens": 100, "output_tokens": 500},
+                stop_reason="complete",
+                truncated_usage={"input_tokens": 100, "output_tokens": 48}
+            )
+
+    tracker = CostTracker()
+    model = "claude-haiku-4-5-20251001"
+    spec = {"prompts": {"p": "Say hi"}, "models": [model]}
+    path = os.path.join(tmp_path, "results.csv")
+
+    ModelEvaluator(Client(), tracker=tracker).run(spec, path)
+
+    row = next(row for row, _ in iter_results(path))
+    assert (row["input_tokens"], row["output_tokens"]) == (200, 548)
+    assert row["cost"] == tracker.total_cost
@@ -0,0 +1,62 @@
+"""Tests for src.llm_client"""
+
+import threading
+
+import pytest
+
+from src.llm_client import LLMClient
+from src.response import LLMResponse
+
+
+def make_client(answers):
+    """Client whose backend returns the given answers in order (cycling)"""
+    client = LLMClient.__new__(LLMClient)
+    client.path = "B"
+    client.default_model = "llama3.2:3b"
+    client.token_budget = None
+    client.semantic_cache = None
+    client.prompt_compactor = None
+    client.calls = 0
+    lock = threading.Lock()
+
+    def backend(prompt, system, model, temperature, max_tokens):
+        with lock:
+            answer = answers[client.calls % len(answers)]
+            client.calls += 1
+        return LLMResponse(
+            content=f"Reasoning... The answer is {answer}",
+            model=model,
+            usage={"input_tokens": 10, "output_tokens": 5},
+            stop_reason="complete"
+        )
+
+    client._generate_ollama = backend
+    return client
+
+
+@pytest.mark.parametrize("n, needed", [(1, 1), (5, 3), (9, 5), (15, 8)])
+def test_unanimous_consensus_stops_issuing(n, needed):
+    client = make_client(["7"])
+
+    result = client.generate_consensus("What is 3 + 4?", n=n)
+
+    assert result["answer"] == "7"
+    assert client.calls == needed
+    assert result["samples"] == needed
+    assert result["usage"] == {"input_tokens": 10 * needed, "output_tokens": 5 * needed}
+
+
+def test_split_vote_uses_all_samples():
+    client = make_client(["7", "8"])
+
+    result = client.generate_consensus("What is 3 + 4?", n=4, max_workers=1)
+
+    assert client.calls == 4
+    assert result["votes"] == {"7": 2, "8": 2}
+    assert not result["stopped_early"]
+
+
+@pytest.mark.parametrize("kwargs", [{"n": 0}, {"majority": 0.4}])
+def test_consensus_rejects_bad_arguments(kwargs):
+    with pytest.raises(ValueError):
+        make_client(["7"]).generate_consensus("What is 3 + 4?", **kwargs)
@@ -0,0 +1,72 @@
+"""Tests for src.prompt_compaction"""
+
+import pytest
+
+from src.cost_tracker import CostTracker
+from src.llm_client import LLMClient
+from src.prompt_compaction import compact_prompt
+from src.prompt_templates import COSTARTemplate
+
+
+@pytest.mark.parametrize("prompt", [
+    "Plan a Thanksgiving dinner menu.",
+    "Write a thank you note for my aunt.",
+    "Translate 'Could you please help me' into Spanish",
+    'Translate "Hello there. Could you please help me?" into Spanish.',
+    "Thanks, John",
+    "Write a story where I want you to stop.",
+])
+def test_meaningful_text_is_kept(prompt):
+    assert compact_prompt(prompt) == prompt
+
+
+def test_filler_sentences_are_removed():
+    prompt = ("Please note that the data is old. Could you please summarize it? "
+              "Thanks in advance.")
+    assert compact_prompt(prompt) == "The data is old. Summarize it?"
+
+
+def test_standalone_thanks_is_removed():
+    assert compact_prompt("Summarize this. Thank you!") == "Summarize this."
+
+
+def test_json_is_minified_and_code_kept():
+    prompt = 'Data: {\n  "a": 1,\n  "b": [1, 2]\n}\n\n```python\nx  =  1\n\n\n```'
+    assert compact_prompt(prompt) == 'Data: {"a":1,"b":[1,2]}\n\n```python\nx  =  1\n\n\n```'
+
+
+def test_json_minify_keeps_numbers_and_duplicate_keys():
+    prompt = 'Check this config: {"version": 1.10, "limit": 1e3, "a": 1, "a": 2}'
+    assert compact_prompt(prompt) == 'Check this config: {"version":1.10,"limit":1e3,"a":1,"a":2}'
+
+
+def test_json_fence_minify_keeps_string_whitespace():
+    prompt = '```json\n{\n  "name": "a  \\" b",\n  "ratio": 0.50\n}\n```'
+    assert compact_prompt(prompt) == '```json\n{"name":"a  \\" b","ratio":0.50}\n```'
+
+
+def test_costar_section_kept_unless_system_states_it_exactly():
+    prompt = COSTARTemplate.build("ctx", "obj", style="formal")
+    assert "# Style\nformal" in compact_prompt(prompt, system="Style: formal and friendly")
+    assert "# Style" not in compact_prompt(prompt, system=COSTARTemplate.build_system(style="formal"))
+
+
+def test_compaction_savings_use_model_pricing():
+    client = LLMClient.__new__(LLMClient)
+    client.path = "B"
+    client.default_model = "llama3.2:3b"
+    client.token_budget = None
+    client.semantic_cache = None
+    client.enable_prompt_compaction()
+    client._generate_ollama = lambda prompt, system, model, temperature, max_tokens: {
+        "content": "ok",
+        "model": model,
+        "usage": {"input_tokens": 1, "output_tokens": 1},
+        "stop_reason": "complete"
+    }
+
+    response = client.generate("Please note that   this is long.  Thank you!")
+
+    assert response["compaction"]["token_savings"] > 0
+    assert response["compaction"]["cost_savings"] == 0.0
+    assert CostTracker.calculate_cost("llama3.2:3b", 1000, 0) == 0.0
@@ -0,0 +1,55 @@
+"""Tests for src.prompt_templates"""
+
+import pytest
+
+from src.prompt_templates import COSTARTemplate, PromptLibrary
+
+
+def test_unpassed_defaults_join_the_prefix():
+    template = COSTARTemplate.compile(style="concise")
+
+    prefix, suffix = template.render_parts(context="Q3 sales", objective="Summarize")
+
+    assert prefix == "# Style\nconcise\n\n# Tone\nhelpful\n\n# Audience\ngeneral\n\n# Response Format\ntext\n\n"
+    assert suffix == "# Context\nQ3 sales\n\n# Objective\nSummarize\n"
+    assert template.render(context="Q3 sales", objective="Summarize") == prefix + suffix
+
+
+def test_prompts_share_the_prefix():
+    template = COSTARTemplate.compile()
+    first = template.render(context="a", objective="b")
+    second = template.render(context="c", objective="d")
+    assert first.startswith(template.prefix) and second.startswith(template.prefix)
+
+
+def test_variable_defaults_match_build():
+    fields = ["style", "tone", "audience", "response_format"]
+    template = COSTARTemplate.compile(variable=fields)
+
+    assert template.render(context="c", objective="o") == COSTARTemplate.build("c", "o")
+    assert (template.render(context="c", objective="o", tone="warm")
+            == COSTARTemplate.build("c", "o", tone="warm"))
+
+
+def test_partial_keeps_variable_fields():
+    template = COSTARTemplate.compile(variable=["tone"]).partial(context="c")
+    assert template.variable_fields == ("objective", "tone")
+    assert template.render(objective="o").endswith("# Tone\nhelpful\n")
+
+
+def test_render_rejects_bound_missing_and_unknown_fields():
+    template = COSTARTemplate.compile()
+    with pytest.raises(TypeError):
+        template.render(context="c", objective="o", tone="warm")
+    with pytest.raises(TypeError):
+        template.render(context="c")
+    with pytest.raises(ValueError):
+        COSTARTemplate.compile(mood="calm")
+
+
+def test_library_compiled_renders_persona_prefix():
+    template = PromptLibrary.get_compiled("tutor")
+    assert template.variable_fields == ("objective",)
+    assert template.render_many([{"objective": "x"}, {"objective": "y"}])[1].endswith(
+        "# Objective\ny\n"
+    )
@@ -0,0 +1,86 @@
+"""Tests for src.response"""
+
+import copy
+import json
+import pickle
+
+import pytest
+
+from src.cost_tracker import CostTracker
+from src.response import LLMResponse, decode_ollama_body
+from src.utils import format_response
+
+
+def make_success():
+    data, raw_context = decode_ollama_body(
+        b'{"model":"llama3.2:3b","response":"Hi","context":[1,2,3],"done":true}'
+    )
+    return LLMResponse.with_context(
+        raw_context,
+        content=data["response"],
+        model=data["model"],
+        usage={"input_tokens": 3, "output_tokens": 1},
+        stop_reason="complete"
+    )
+
+
+def round_trips():
+    return [
+        copy.copy,
+        copy.deepcopy,
+        lambda r: r.copy(),
+        lambda r: pickle.loads(pickle.dumps(r)),
+    ]
+
+
+@pytest.mark.parametrize("round_trip", round_trips())
+def test_success_round_trip(round_trip):
+    response = round_trip(make_success())
+
+    assert isinstance(response, LLMResponse)
+    assert "error" not in response
+    assert response["content"] == "Hi"
+    assert response.context == [1, 2, 3]
+    assert "Hi" in format_response(response)
+
+    tracker = CostTracker()
+    tracker.add_call(response)
+    assert len(tracker.calls) == 1
+
+
+@pytest.mark.parametrize("round_trip", round_trips())
+def test_error_round_trip(round_trip):
+    response = round_trip(LLMResponse(error="HTTP 500", model="llama3.2:3b"))
+
+    assert "error" in response
+    assert "content" not in response
+    assert response.context is None
+
+    tracker = CostTracker()
+    tracker.add_call(response)
+    assert tracker.calls == []
+
+
+def test_behaves_like_dict():
+    response = make_success()
+
+    assert isinstance(response, dict)
+    assert json.loads(json.dumps(response)) == {
+        "content": "Hi",
+        "model": "llama3.2:3b",
+        "usage": {"input_tokens": 3, "output_tokens": 1},
+        "stop_reason": "complete"
+    }
+    assert "context" not in response
+
+
+def test_context_is_decoded_once():
+    response = make_success()
+    assert response.context is response.context
+    assert response.copy().context is response.context
+
+
+def test_decode_without_context():
+    data, raw_context = decode_ollama_body(b'{"response":"Hi","done":true}')
+    assert data == {"response": "Hi", "done": True}
+    assert raw_context is None
@@ -0,0 +1,88 @@
+"""Tests for src.semantic_cache"""
+
+import pytest
+
+from src.semantic_cache import NearDuplicateCache, normalize_prompt
+
+
+SCOPE = ("llama3.2:3b", None, None)
+TEMPLATE = ("You are a support assistant for an online store. Answer politely and "
+            "briefly, cite the relevant policy section, and never invent order data. "
+            "Customer message: ")
+
+
+def answer(content):
+    return {"content": content, "model": "llama3.2:3b", "usage": {"input_tokens": 1, "output_tokens": 1}}
+
+
+@pytest.mark.parametrize("stored, other", [
+    ("What is 2+2?", "What is 2*2?"),
+    ("What is 2+2?", "what is 2 - 2"),
+    ("What weekday was 2024-01-01?", "What weekday was 2024-06-15?"),
+    ("Where is order 1234567890?", "Where is order 9876543210?"),
+    ("Convert 3.14 to a fraction", "Convert 314 to a fraction"),
+])
+def test_different_questions_miss(stored, other):
+    cache = NearDuplicateCache()
+    cache.store(stored, SCOPE, answer("cached"))
+    assert cache.lookup(other, SCOPE) is None
+
+
+@pytest.mark.parametrize("stored, other", [
+    ("What is 2+2?", "  what IS 2+2 "),
+    ("Summarize the log from 2024-01-01T10:00:00Z", "Summarize the log from 2024-01-01T11:30:05Z"),
+])
+def test_near_duplicates_hit(stored, other):
+    cache = NearDuplicateCache()
+    cache.store(stored, SCOPE, answer("cached"))
+    hit = cache.lookup(other, SCOPE)
+    assert hit["content"] == "cached"
+    assert hit["similarity"] == 1.0
+
+
+def test_similarity_is_exact_jaccard():
+    cache = NearDuplicateCache(threshold=0.5)
+    stored = TEMPLATE + "Where is my parcel? It was due on Monday."
+    other = TEMPLATE + "Where is my parcel? It was due on Friday."
+    cache.store(stored, SCOPE, answer("cached"))
+
+    a, b = cache.shingles(stored), cache.shingles(other)
+    assert cache.lookup(other, SCOPE)["similarity"] == len(a & b) / len(a | b)
+
+
+def test_scope_is_exact():
+    cache = NearDuplicateCache()
+    cache.store("What is 2+2?", SCOPE, answer("4"))
+    assert cache.lookup("What is 2+2?", ("claude-haiku-4-5-20251001", None, None)) is None
+
+
+def test_hot_buckets_are_skipped_then_restored_by_eviction():
+    cache = NearDuplicateCache(max_bucket_size=4, max_entries=1000)
+    prompts = [TEMPLATE + f"Question number {i} about refunds" for i in range(12)]
+    for i, prompt in enumerate(prompts):
+        cache.store(prompt, SCOPE, answer(str(i)))
+    assert any(len(bucket) > 4 for bucket in cache._buckets.values())
+
+    cache.max_entries = 4
+    with cache._lock:
+        while len(cache._entries) > cache.max_entries:
+            cache._evict()
+
+    assert all(len(bucket) <= 4 for bucket in cache._buckets.values())
+    live = set(cache._entries)
+    assert all(set(bucket) <= live for bucket in cache._buckets.values())
+    assert set(cache._exact.values()) == live
+    assert cache.lookup(prompts[-1] + " please", SCOPE) is not None
+
+
+def test_eviction_keeps_newest_entries():
+    cache = NearDuplicateCache(max_entries=2)
+    for question in ("What is 2+2?", "What is 3+3?", "What is 4+4?"):
+        cache.store(question, SCOPE, answer(question))
+    assert cache.lookup("What is 2+2?", SCOPE) is None
+    assert cache.lookup("What is 4+4?", SCOPE)["content"] == "What is 4+4?"
+    assert cache.get_summary()["entries"] == 2
+
+
+def test_normalize_keeps_symbols_and_drops_prose_punctuation():
+    assert normalize_prompt("Is x >= 3, really?!") == ["is", "x", ">", "=", "3", "really"]
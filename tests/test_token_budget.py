@@ -0,0 +1,69 @@
+"""Tests for src.token_budget and adaptive max_tokens in LLMClient.generate()"""
+
+from src.cost_tracker import CostTracker
+from src.llm_client import LLMClient
+from src.response import LLMResponse
+
+
+MODEL = "claude-haiku-4-5-20251001"
+
+
+def record(tracker, output_tokens, count):
+    for _ in range(count):
+        tracker.add_call(LLMResponse(
+            content="x",
+            model=MODEL,
+            usage={"input_tokens": 10, "output_tokens": output_tokens},
+            stop_reason="complete"
+        ))
+
+
+def make_client(tracker, replies):
+    """Client whose backend returns the given replies in order"""
+    client = LLMClient.__new__(LLMClient)
+    client.path = "A"
+    client.default_model = MODEL
+    client.semantic_cache = None
+    client.prompt_compactor = None
+    client.enable_adaptive_max_tokens(tracker, min_samples=10)
+    replies = list(replies)
+    client._generate_claude = lambda prompt, system, model, temperature, max_tokens: replies.pop(0)
+    return client
+
+
+def test_suggest_uses_history_percentile():
+    tracker = CostTracker()
+    client = make_client(tracker, [])
+    record(tracker, 100, 20)
+    assert client.token_budget.suggest(MODEL, requested=1024) == 125
+
+
+def test_reset_is_detected_even_after_new_calls():
+    tracker = CostTracker()
+    budget = make_client(tracker, []).token_budget
+    record(tracker, 100, 20)
+    assert budget.suggest(MODEL, requested=1024) == 125
+
+    tracker.reset()
+    record(tracker, 400, 30)
+    assert budget.history(MODEL) == [400] * 30
+    assert budget.suggest(MODEL, requested=1024) == 500
+
+
+def test_failed_retry_keeps_truncated_attempt_billed():
+    tracker = CostTracker()
+    truncated = LLMResponse(
+        content="partial",
+        model=MODEL,
+        usage={"input_tokens": 10, "output_tokens": 125},
+        stop_reason="max_tokens"
+    )
+    client = make_client(tracker, [truncated, LLMResponse(error="HTTP 529", model=MODEL)])
+    record(tracker, 100, 20)
+
+    response = client.generate("Hi", max_tokens=1024)
+    tracker.add_call(response)
+
+    assert response["content"] == "partial"
+    assert tracker.calls[-1]["output_tokens"] == 125
+    assert client.token_budget.get_summary()["reserved_tokens"] == 125 + 1024